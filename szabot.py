@@ -8,8 +8,9 @@ move players into temporary voice channels for each team, pause/resume the
 match (moving everyone back to a central lobby channel or returning them to
 their team channels) and end the match. When a match ends the bot awards
 BSNBucks ($BSN) to each player on the winning team and deducts BSNBucks from
-players on the losing team. The bot maintains BSNBucks balances in a JSON
-file on disk.
+players on the losing team. The bot maintains BSNBucks balances per server,
+in one JSON-Lines file per server on disk. Balances from the single
+``bsn_data.json`` file used by older versions are migrated on startup.
 
 To use this bot you must create a Discord application and bot account,
 enable the appropriate intents (Guild Members and Voice States) in the
@@ -18,70 +19,287 @@ applications.commands and bot scopes. You should set the bot token as
 the environment variable DISCORD_BOT_TOKEN before running this script.
 
 This code depends on the ``discord.py`` library version 2.0 or higher.
-You can install it with ``pip install -U discord.py``.
+You can install it with ``pip install -U discord.py``. If ``orjson`` is
+installed it is used to speed up reading and writing the BSNBucks file.
 """
 
 import os
+import re
+import glob
 import json
+import atexit
+import time
+import heapq
+import inspect
+import logging
 import random
 import asyncio
+import functools
+import operator
+from collections import Counter
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, KeysView, List, Optional, Set, Tuple
 
 import discord
 from discord import app_commands
 from discord.ext import commands
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-def load_bsn_data(path: str) -> Dict[int, int]:
-    """Load BSNBucks data from a JSON file.
+log = logging.getLogger("szabot")
 
-    The data is stored as a mapping from Discord user ID (int) to their
-    BSNBucks balance (int). If the file does not exist it returns an
-    empty dictionary.
+# Delay in seconds used to coalesce BSNBucks updates into a single write
+BSN_FLUSH_DELAY = 1.0
+# The BSNBucks log is compacted once it holds this many records per user
+BSN_COMPACT_RATIO = 10
+# File extension of the per-guild BSNBucks log files
+BSN_SHARD_SUFFIX = ".jsonl"
+# Maximum number of voice moves issued concurrently in a guild
+MAX_CONCURRENT_MOVES = 5
+# Discord allows roughly this many voice moves per guild per interval (seconds)
+MOVE_RATE_LIMIT = 5
+MOVE_RATE_INTERVAL = 5.0
+# How many times a rate limited (HTTP 429) move is retried
+MOVE_RETRIES = 3
+# Number of players shown on the BSNBucks leaderboard
+LEADERBOARD_SIZE = 10
+
+# Matches a user mention (<@123> or <@!123>) or a bare numeric user ID
+_MENTION_RE = re.compile(r"<@!?(\d+)>|(\d+)")
+# Extracts the user ID from a member
+_member_id = operator.attrgetter("id")
+
+
+def _dump_bsn_record(uid: int, value: int) -> bytes:
+    """Serialize a single BSNBucks log record as a line of JSON."""
+    record = {"u": uid, "d": value}
+    if orjson is not None:
+        return orjson.dumps(record) + b"\n"
+    return (json.dumps(record) + "\n").encode("utf-8")
+
+
+_load_bsn_record = orjson.loads if orjson is not None else json.loads
+
+
+def load_bsn_data(path: str) -> Counter[int]:
+    """Load BSNBucks data from a JSON-Lines log file.
+
+    Each line of the file is a record ``{"u": user_id, "d": delta}``. The
+    balances are rebuilt by summing the deltas per user. Damaged records,
+    such as a line torn by a crash mid-write, are skipped. Files written by
+    older versions of the bot (a single JSON object mapping user IDs to
+    balances) are still understood. If the file does not exist it returns
+    an empty dictionary.
 
     Parameters
     ----------
     path: str
-        The path to the JSON file.
+        The path to the log file.
 
     Returns
     -------
-    Dict[int, int]
-        A dictionary mapping user IDs to BSNBucks balances.
+    Counter[int]
+        A counter mapping user IDs to BSNBucks balances.
+
+    Raises
+    ------
+    OSError, ValueError
+        If the file exists but cannot be read. Callers must not overwrite
+        it in that case, since it may still hold balances.
     """
     if not os.path.exists(path):
-        return {}
-    try:
-        with open(path, "r", encoding="utf-8") as f:
+        return Counter()
+    balances: Counter[int] = Counter()
+    # Read raw bytes so an invalid byte only spoils the record it is in
+    with open(path, "rb") as f:
+        first = f.readline().strip()
+        if first in (b"{", b"{}"):
+            # Legacy format written with json.dump(..., indent=2)
+            f.seek(0)
             data = json.load(f)
-        # Convert keys back to int
-        return {int(k): int(v) for k, v in data.items()}
-    except Exception:
-        return {}
+            # Only the keys need converting; JSON values are already ints
+            return Counter({int(k): v for k, v in data.items()})
+        f.seek(0)
+        for line in f:
+            try:
+                # Both loaders decode the UTF-8 bytes themselves
+                record = _load_bsn_record(line)
+                # Records store user IDs and deltas as JSON integers, so
+                # they decode to ints without any conversion
+                balances[record["u"]] += record["d"]
+            except (ValueError, KeyError, TypeError):
+                # Skip blank, partially written or corrupted records
+                continue
+    return balances
+
+
+def load_bsn_shards(directory: str) -> Tuple[Dict[int, Counter[int]], Set[int]]:
+    """Load the BSNBucks data of every guild from a directory.
+
+    Each guild's balances live in their own log file named
+    ``<guild_id>.jsonl`` inside ``directory``. Files whose name is not a
+    guild ID are ignored.
+
+    Parameters
+    ----------
+    directory: str
+        The directory holding the per-guild log files.
+
+    Returns
+    -------
+    Tuple[Dict[int, Counter[int]], Set[int]]
+        A dictionary mapping guild IDs to their BSNBucks balances, and the
+        IDs of the guilds whose file could not be read. Those guilds are
+        left out of the dictionary.
+    """
+    shards: Dict[int, Counter[int]] = {}
+    unreadable: Set[int] = set()
+    for path in glob.glob(os.path.join(directory, "*" + BSN_SHARD_SUFFIX)):
+        stem = os.path.basename(path)[:-len(BSN_SHARD_SUFFIX)]
+        if not stem.isdigit():
+            continue
+        try:
+            shards[int(stem)] = load_bsn_data(path)
+        except Exception:
+            log.exception("Failed to load BSNBucks data from %s", path)
+            unreadable.add(int(stem))
+    return shards, unreadable
 
 
 def save_bsn_data(path: str, data: Dict[int, int]) -> None:
-    """Save BSNBucks data to a JSON file.
+    """Save a full snapshot of BSNBucks data to a JSON-Lines log file.
 
-    The data is stored as a mapping from Discord user ID (int) to their
-    BSNBucks balance (int). Keys are converted to strings because JSON
-    requires string keys.
+    The file is rewritten with one ``{"u": user_id, "d": balance}`` record
+    per user, which is the compacted form of the delta log read by
+    :func:`load_bsn_data`. Errors are propagated to the caller.
 
     Parameters
     ----------
     path: str
-        The path to the JSON file.
+        The path to the log file.
     data: Dict[int, int]
         The mapping from user IDs to BSNBucks balances.
     """
-    try:
-        to_dump = {str(k): v for k, v in data.items()}
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(to_dump, f, indent=2)
-    except Exception:
-        # If saving fails we silently ignore to avoid crashing the bot
-        pass
+    # Write to a temporary file first so a crash mid-write never leaves a
+    # truncated log behind
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(b"".join(_dump_bsn_record(uid, balance) for uid, balance in data.items()))
+    os.replace(tmp_path, path)
+
+
+def append_bsn_deltas(path: str, deltas: Iterable[Tuple[int, int]]) -> None:
+    """Append balance changes to the BSNBucks log file in a single write.
+
+    Errors are propagated to the caller.
+
+    Parameters
+    ----------
+    path: str
+        The path to the log file.
+    deltas: Iterable[Tuple[int, int]]
+        Pairs of Discord user ID and the amount added to (or subtracted
+        from) that user's balance.
+    """
+    data = b"".join(_dump_bsn_record(uid, delta) for uid, delta in deltas)
+    with open(path, "ab") as f:
+        f.write(data)
+
+
+def compact_bsn_log(path: str, data: Dict[int, int], line_count: int) -> int:
+    """Rewrite the BSNBucks log as a snapshot once it has grown too long.
+
+    Parameters
+    ----------
+    path: str
+        The path to the log file.
+    data: Dict[int, int]
+        The current mapping from user IDs to BSNBucks balances.
+    line_count: int
+        The number of records currently in the log file.
+
+    Returns
+    -------
+    int
+        The number of records in the log file after compaction.
+    """
+    if line_count <= BSN_COMPACT_RATIO * max(len(data), 1):
+        return line_count
+    save_bsn_data(path, data)
+    return len(data)
+
+
+def parse_members(guild: discord.Guild, input_str: Optional[str]) -> List[discord.Member]:
+    """Parse a list of player mentions or IDs into guild members.
+
+    Parameters
+    ----------
+    guild: discord.Guild
+        The guild used to resolve user IDs to members.
+    input_str: str, optional
+        Comma separated mentions (e.g. ``<@123456789>``) or numeric IDs.
+
+    Returns
+    -------
+    List[discord.Member]
+        The members found in the guild, in input order and without
+        duplicates. IDs that do not resolve to a member are skipped.
+    """
+    if not input_str:
+        return []
+    members = (
+        guild.get_member(int(mention or uid))
+        for mention, uid in _MENTION_RE.findall(input_str)
+    )
+    return list(dict.fromkeys(m for m in members if m is not None))
+
+
+class TokenBucketRateLimiter:
+    """Asynchronous token bucket rate limiter.
+
+    Allows bursts of up to ``max_tokens`` acquisitions and refills at a rate
+    of ``max_tokens`` tokens every ``refill_interval`` seconds. Use it as an
+    async context manager around the rate limited call.
+
+    Parameters
+    ----------
+    max_tokens: int
+        The bucket capacity.
+    refill_interval: float
+        The time in seconds it takes to refill an empty bucket.
+    """
+
+    def __init__(self, max_tokens: int = MOVE_RATE_LIMIT, refill_interval: float = MOVE_RATE_INTERVAL):
+        self.max_tokens = max_tokens
+        self.refill_interval = refill_interval
+        self._tokens = float(max_tokens)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        rate = self.max_tokens / self.refill_interval
+        self._tokens = min(self.max_tokens, self._tokens + (now - self._updated) * rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and consume it."""
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) * self.refill_interval / self.max_tokens)
+                self._refill()
+            self._tokens -= 1
+
+    async def __aenter__(self) -> "TokenBucketRateLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        return None
 
 
 @dataclass
@@ -92,8 +310,9 @@ class GameSession:
     ----------
     guild_id : int
         The ID of the guild (server) where the game is running.
-    teams : List[List[discord.Member]]
-        A list containing exactly two lists of players for the two teams.
+    teams : List[Dict[int, discord.Member]]
+        A list containing exactly two teams. Each team maps user ID to
+        member, in the order the players were assigned.
     team_channels : List[discord.VoiceChannel]
         A list of two voice channels corresponding to the two teams.
     central_channel : discord.VoiceChannel
@@ -109,39 +328,85 @@ class GameSession:
         in before the game was paused. Used to restore users on resume.
     paused : bool
         Indicates whether the game is currently paused.
+    torn_down : bool
+        Set once the session's temporary channels are being deleted.
+    move_limiter : TokenBucketRateLimiter
+        Rate limiter shared by all voice moves in the guild.
+    move_semaphore : asyncio.Semaphore
+        Caps the number of voice moves in flight at once in the guild.
+    name_cache : Dict[int, str]
+        A mapping from user ID to display name for every player, filled
+        when the session is created.
     """
 
     guild_id: int
-    teams: List[List[discord.Member]]
+    teams: List[Dict[int, discord.Member]]
     team_channels: List[discord.VoiceChannel]
     central_channel: discord.VoiceChannel
     category: discord.CategoryChannel
     original_channels: Dict[int, Optional[int]] = field(default_factory=dict)
     paused_locations: Dict[int, int] = field(default_factory=dict)
     paused: bool = False
+    torn_down: bool = False
+    move_limiter: TokenBucketRateLimiter = field(default_factory=TokenBucketRateLimiter, repr=False)
+    move_semaphore: asyncio.Semaphore = field(
+        default_factory=lambda: asyncio.Semaphore(MAX_CONCURRENT_MOVES), repr=False
+    )
+    name_cache: Dict[int, str] = field(default_factory=dict, init=False, repr=False)
 
-    async def move_players_to_team_channels(self) -> None:
-        """Move players into their team voice channels.
+    def __post_init__(self) -> None:
+        # Resolve display names once for the lifetime of the match
+        self.name_cache = {m.id: m.display_name for team in self.teams for m in team.values()}
 
-        For each player in each team, this function moves the player into
-        the corresponding team voice channel. It records the player's
-        original voice channel if not already recorded.
+    @property
+    def team_member_ids(self) -> Tuple[KeysView[int], KeysView[int]]:
+        """The user IDs on each team, as live views for O(1) membership checks.
+
+        The views track the team dicts, so they stay correct across trades
+        without any bookkeeping.
         """
-        for team_index, team in enumerate(self.teams):
-            channel = self.team_channels[team_index]
-            for member in team:
+        return self.teams[0].keys(), self.teams[1].keys()
+
+    async def _safe_move(self, member: discord.Member, channel: Optional[discord.VoiceChannel]) -> None:
+        """Move a member to ``channel``, ignoring any failure.
+
+        Each attempt waits for a token from the guild's move limiter. Moves
+        rejected with HTTP 429 are retried with exponential backoff.
+        """
+        async with self.move_semaphore:
+            for attempt in range(MOVE_RETRIES + 1):
                 try:
-                    # Record original channel if not already stored
-                    if member.id not in self.original_channels:
-                        if member.voice:
-                            self.original_channels[member.id] = member.voice.channel.id
-                        else:
-                            self.original_channels[member.id] = None
-                    if member.voice is None or member.voice.channel.id != channel.id:
+                    async with self.move_limiter:
                         await member.move_to(channel)
+                    return
+                except discord.HTTPException as e:
+                    if e.status != 429 or attempt == MOVE_RETRIES:
+                        return
+                    await asyncio.sleep(2 ** attempt)
                 except Exception:
                     # Ignore move failures silently
-                    continue
+                    return
+
+    async def move_players_to_team_channels(self) -> None:
+        """Move players into their team voice channels.
+
+        For each player in each team, this function moves the player into
+        the corresponding team voice channel. It records the player's
+        original voice channel if not already recorded. The moves are
+        issued concurrently.
+        """
+        tasks = []
+        for team, channel in zip(self.teams, self.team_channels):
+            for member in team.values():
+                # Record original channel if not already stored
+                if member.id not in self.original_channels:
+                    if member.voice:
+                        self.original_channels[member.id] = member.voice.channel.id
+                    else:
+                        self.original_channels[member.id] = None
+                if member.voice is None or member.voice.channel.id != channel.id:
+                    tasks.append(self._safe_move(member, channel))
+        await asyncio.gather(*tasks, return_exceptions=True)
 
     async def move_all_to_central(self) -> None:
         """Move all players to the central lobby channel.
@@ -150,15 +415,14 @@ class GameSession:
         came from so that they can be returned to their team channels on
         resume.
         """
-        for team_index, team in enumerate(self.teams):
-            for member in team:
-                try:
-                    # Record the channel where they were before moving
-                    if member.voice:
-                        self.paused_locations[member.id] = member.voice.channel.id
-                    await member.move_to(self.central_channel)
-                except Exception:
-                    continue
+        tasks = []
+        for team in self.teams:
+            for member in team.values():
+                # Record the channel where they were before moving
+                if member.voice:
+                    self.paused_locations[member.id] = member.voice.channel.id
+                tasks.append(self._safe_move(member, self.central_channel))
+        await asyncio.gather(*tasks, return_exceptions=True)
 
     async def move_back_from_central(self) -> None:
         """Move players back to their team voice channels after a pause.
@@ -167,57 +431,57 @@ class GameSession:
         their team channels. If for some reason the location is missing, it
         defaults to moving them into their team's voice channel again.
         """
-        for team_index, team in enumerate(self.teams):
-            channel = self.team_channels[team_index]
-            for member in team:
-                try:
-                    if member.id in self.paused_locations:
-                        target_id = self.paused_locations[member.id]
-                        # If the saved location corresponds to one of the team channels
-                        # we move them there; otherwise default to the team channel
-                        target_channel = None
-                        if target_id == channel.id:
-                            target_channel = channel
-                        else:
-                            # Attempt to fetch the channel
-                            target_channel = member.guild.get_channel(target_id)
-                        if target_channel is None:
-                            target_channel = channel
-                        await member.move_to(target_channel)
-                    else:
-                        await member.move_to(channel)
-                except Exception:
-                    continue
+        # Saved locations are almost always one of the team channels
+        channel_by_id = {ch.id: ch for ch in self.team_channels}
+        tasks = []
+        for team, channel in zip(self.teams, self.team_channels):
+            for member in team.values():
+                target_id = self.paused_locations.get(member.id)
+                if target_id is None:
+                    target_channel = channel
+                else:
+                    target_channel = (
+                        channel_by_id.get(target_id)
+                        or member.guild.get_channel(target_id)
+                        or channel
+                    )
+                tasks.append(self._safe_move(member, target_channel))
+        await asyncio.gather(*tasks, return_exceptions=True)
         self.paused_locations.clear()
 
-    async def teardown(self) -> None:
-        """Clean up temporary channels and category when the game ends.
+    async def teardown_channels(self) -> None:
+        """Delete the team and central voice channels concurrently."""
+        channels = [*self.team_channels, self.central_channel]
+        await asyncio.gather(
+            *(ch.delete(reason="ZoneWars match ended") for ch in channels),
+            return_exceptions=True
+        )
 
-        Deletes the team and central voice channels and the category that
-        contains them.
+    async def teardown_category(self) -> None:
+        """Delete the match category.
+
+        Call this after :meth:`teardown_channels` so the category is empty.
         """
-        # Delete team channels
-        for ch in self.team_channels:
-            try:
-                await ch.delete(reason="ZoneWars match ended")
-            except Exception:
-                continue
-        # Delete central channel
-        try:
-            await self.central_channel.delete(reason="ZoneWars match ended")
-        except Exception:
-            pass
-        # Delete category
         try:
             await self.category.delete(reason="ZoneWars match ended")
         except Exception:
             pass
 
+    async def teardown(self) -> None:
+        """Clean up temporary channels and category when the game ends.
+
+        Deletes the team and central voice channels and the category that
+        contains them.
+        """
+        await self.teardown_channels()
+        await self.teardown_category()
+
 
 class SZABot(commands.Bot):
     """Discord bot to manage Fortnite ZoneWars matches."""
 
-    def __init__(self, *, command_prefix: str = "!", bsn_file: str = "bsn_data.json"):
+    def __init__(self, *, command_prefix: str = "!", bsn_dir: str = "bsn",
+                 legacy_bsn_file: str = "bsn_data.json"):
         intents = discord.Intents.default()
         # We need member and voice state intents to move users
         intents.members = True
@@ -225,31 +489,114 @@ class SZABot(commands.Bot):
         # We also need guilds for slash commands
         intents.guilds = True
         super().__init__(command_prefix=command_prefix, intents=intents)
-        # The JSON file path for BSNBucks
-        self.bsn_file = bsn_file
-        # In-memory BSNBucks balances; key: user ID, value: int
-        self.bsn_balances: Dict[int, int] = load_bsn_data(self.bsn_file)
-        # Active game sessions keyed by guild ID
-        self.active_games: Dict[int, GameSession] = {}
+        # The directory holding one BSNBucks log file per guild
+        self.bsn_dir = bsn_dir
+        os.makedirs(self.bsn_dir, exist_ok=True)
+        # The single BSNBucks file used by older versions, migrated on ready
+        self.legacy_bsn_file = legacy_bsn_file
+        shards, unreadable = load_bsn_shards(self.bsn_dir)
+        # In-memory BSNBucks balances; key: guild ID, value: balances by user ID
+        self.bsn_balances: Dict[int, Counter[int]] = shards
+        # Guilds whose last write failed; their next write saves a full snapshot
+        self._persistence_failed: Set[int] = set()
+        # Number of records in each guild's log file
+        self._bsn_log_lines: Dict[int, int] = {}
+        # Keep unreadable logs for manual recovery; the guild starts over in
+        # a fresh file. If a log cannot be moved aside, refuse to start rather
+        # than overwrite it.
+        for guild_id in unreadable:
+            path = self._bsn_path(guild_id)
+            os.replace(path, f"{path}.corrupt-{int(time.time())}")
+            log.error("Moved unreadable BSNBucks data in %s aside", path)
+            self.bsn_balances[guild_id] = Counter()
+            self._persistence_failed.add(guild_id)
+            self._bsn_log_lines[guild_id] = 0
+        # Fold the logs into snapshots so they start out one record per user
+        for guild_id, balances in self.bsn_balances.items():
+            if guild_id in unreadable:
+                continue
+            path = self._bsn_path(guild_id)
+            try:
+                save_bsn_data(path, balances)
+            except Exception:
+                log.exception("Failed to compact BSNBucks data in %s", path)
+                self._persistence_failed.add(guild_id)
+            self._bsn_log_lines[guild_id] = len(balances)
+        # Balance changes not yet appended to the logs, keyed by guild ID
+        self._bsn_pending: Dict[int, List[Tuple[int, int]]] = {}
+        # Serializes log writes so appends and compaction never interleave
+        self._bsn_write_lock = asyncio.Lock()
+        # Top balances for each guild's leaderboard, dropped after a change
+        self._leaderboard_cache: Dict[int, List[Tuple[int, int]]] = {}
+        # Pending debounced flush, if one is scheduled
+        self._bsn_flush_handle: Optional[asyncio.TimerHandle] = None
+        # Make sure pending balance changes reach disk even on abrupt exit
+        atexit.register(self._flush_bsn_sync)
 
     async def setup_hook(self) -> None:
-        """Called on bot startup to sync slash commands."""
-        # Register all app commands on the command tree before syncing
-        self.tree.add_command(self.setup_command)
-        self.tree.add_command(self.help_command)
-        self.tree.add_command(self.bsn_balance)
-        self.tree.add_command(self.bsn_leaderboard)
-        self.tree.add_command(self.create_teams)
-        self.tree.add_command(self.trade_players)
-        self.tree.add_command(self.pause_game)
-        self.tree.add_command(self.resume_game)
-        self.tree.add_command(self.end_game)
-        # Sync commands with all guilds
-        await self.tree.sync()
+        """Called on bot startup to register and sync slash commands.
+
+        If the ``TEST_GUILD`` environment variable holds a guild ID the
+        commands are synced to that guild only, which takes effect
+        immediately instead of waiting for global propagation.
+        """
+        # Adding the cog registers its app commands on the command tree
+        await self.add_cog(SZACog(self))
+        test_guild = os.environ.get("TEST_GUILD")
+        if test_guild:
+            guild = discord.Object(id=int(test_guild))
+            self.tree.copy_global_to(guild=guild)
+            await self.tree.sync(guild=guild)
+        else:
+            # Sync commands with all guilds
+            await self.tree.sync()
+
+    async def on_ready(self) -> None:
+        """Called once the guilds and their members are cached."""
+        await self.migrate_legacy_bsn()
+
+    async def migrate_legacy_bsn(self) -> None:
+        """Move balances from the old global BSNBucks file into the guild logs.
+
+        Older versions kept one balance per user for every guild in
+        ``legacy_bsn_file``. Each guild the bot is in is credited with the
+        old balances of its members. The file is renamed before the balances
+        are written, so a crash can never apply it twice; the renamed copy is
+        kept for manual recovery.
+        """
+        path = self.legacy_bsn_file
+        if not os.path.exists(path):
+            return
+        try:
+            legacy = await asyncio.to_thread(load_bsn_data, path)
+        except Exception:
+            log.exception("Failed to load legacy BSNBucks data from %s; balances were NOT migrated", path)
+            return
+        migrated_path = path + ".migrated"
+        try:
+            os.replace(path, migrated_path)
+        except OSError:
+            log.exception("Failed to rename %s; legacy BSNBucks balances were NOT migrated", path)
+            return
+        guild_count = 0
+        for guild in self.guilds:
+            deltas = {
+                uid: balance for uid, balance in legacy.items()
+                if balance and guild.get_member(uid) is not None
+            }
+            if deltas:
+                self.apply_bsn_delta(guild.id, deltas)
+                guild_count += 1
+        await self.flush_bsn()
+        log.warning("Migrated legacy BSNBucks data from %s into %d guilds; the old file was renamed to %s",
+                    path, guild_count, migrated_path)
 
     def add_bsn(self, member: discord.Member, amount: int) -> None:
         """Adjust a member's BSNBucks balance by a given amount.
 
+        Balances are kept per guild, so the change applies to the balance
+        the member holds in ``member.guild``.
+
         Parameters
         ----------
         member: discord.Member
@@ -257,10 +604,326 @@ class SZABot(commands.Bot):
         amount: int
             The amount to add (positive) or subtract (negative).
         """
-        current = self.bsn_balances.get(member.id, 0)
-        self.bsn_balances[member.id] = current + amount
-        # Persist the updated balances
-        save_bsn_data(self.bsn_file, self.bsn_balances)
+        self.apply_bsn_delta(member.guild.id, {member.id: amount})
+
+    def apply_bsn_delta(self, guild_id: int, deltas: Dict[int, int]) -> None:
+        """Adjust several BSNBucks balances in a guild at once.
+
+        All changes are queued together, so they reach disk in a single
+        write no matter how many users are involved.
+
+        Parameters
+        ----------
+        guild_id: int
+            The guild whose balances will be adjusted.
+        deltas: Dict[int, int]
+            A mapping from user ID to the amount to add (positive) or
+            subtract (negative).
+        """
+        balances = self.balances_for(guild_id)
+        for uid, amount in deltas.items():
+            balances[uid] += amount
+        self._leaderboard_cache.pop(guild_id, None)
+        self._bsn_pending.setdefault(guild_id, []).extend(deltas.items())
+        # Persist lazily so a burst of updates results in a single write. If
+        # the last write failed, retry right away rather than risk losing
+        # more changes.
+        self._schedule_bsn_flush(immediate=guild_id in self._persistence_failed)
+
+    def balances_for(self, guild_id: int) -> Counter[int]:
+        """Return the BSNBucks balances of a guild, creating them if needed."""
+        balances = self.bsn_balances.get(guild_id)
+        if balances is None:
+            balances = self.bsn_balances[guild_id] = Counter()
+        return balances
+
+    def _bsn_path(self, guild_id: int) -> str:
+        """Return the path of a guild's BSNBucks log file."""
+        return os.path.join(self.bsn_dir, f"{guild_id}{BSN_SHARD_SUFFIX}")
+
+    def _schedule_bsn_flush(self, immediate: bool = False) -> None:
+        """Schedule a debounced write of the BSNBucks balances.
+
+        Only one flush is pending at a time; further updates made before it
+        fires are picked up by the same write. With ``immediate`` set the
+        flush runs on the next loop iteration instead of after the delay.
+        """
+        if self._bsn_flush_handle is not None:
+            if not immediate:
+                return
+            self._bsn_flush_handle.cancel()
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (e.g. called from a script), write immediately
+            self._flush_bsn_sync()
+            return
+        self._bsn_flush_handle = loop.call_later(
+            0 if immediate else BSN_FLUSH_DELAY, lambda: asyncio.create_task(self._flush_bsn())
+        )
+
+    def _take_bsn_pending(self) -> Dict[int, List[Tuple[int, int]]]:
+        """Return the pending changes of every guild that needs a write.
+
+        Guilds whose previous write failed are included even without new
+        changes so that they are retried.
+        """
+        pending, self._bsn_pending = self._bsn_pending, {}
+        for guild_id in self._persistence_failed:
+            pending.setdefault(guild_id, [])
+        return pending
+
+    async def _flush_bsn(self) -> None:
+        """Append pending BSNBucks changes to disk without blocking the event loop."""
+        self._bsn_flush_handle = None
+        pending = self._take_bsn_pending()
+        # Snapshot the balances so the writer thread never sees a dict that
+        # is being mutated by a command handler.
+        snapshots = {guild_id: dict(self.balances_for(guild_id)) for guild_id in pending}
+        async with self._bsn_write_lock:
+            # Each guild has its own file, so only the changed ones are written
+            for guild_id, changes in pending.items():
+                line_count = await asyncio.to_thread(
+                    self._write_bsn_log, guild_id, changes, snapshots[guild_id],
+                    self._bsn_log_lines.get(guild_id, 0), guild_id in self._persistence_failed
+                )
+                self._finish_bsn_write(guild_id, changes, line_count)
+
+    async def flush_bsn(self) -> None:
+        """Write pending BSNBucks changes now instead of waiting for the debounce."""
+        if self._bsn_flush_handle is not None:
+            self._bsn_flush_handle.cancel()
+        await self._flush_bsn()
+
+    def _flush_bsn_sync(self) -> None:
+        """Synchronously append any pending BSNBucks changes to disk.
+
+        This bypasses the write lock, so only call it when no event loop is
+        running (at interpreter exit or from a script).
+        """
+        if self._bsn_flush_handle is not None:
+            self._bsn_flush_handle.cancel()
+            self._bsn_flush_handle = None
+        for guild_id, changes in self._take_bsn_pending().items():
+            line_count = self._write_bsn_log(
+                guild_id, changes, self.balances_for(guild_id),
+                self._bsn_log_lines.get(guild_id, 0), guild_id in self._persistence_failed
+            )
+            self._finish_bsn_write(guild_id, changes, line_count)
+
+    def _write_bsn_log(self, guild_id: int, pending: List[Tuple[int, int]], balances: Dict[int, int],
+                       line_count: int, full: bool) -> Optional[int]:
+        """Append ``pending`` to a guild's log, compacting it if needed.
+
+        If ``full`` is set (the previous write for the guild failed, so the
+        log may be missing changes) a full snapshot of ``balances`` is
+        written instead. This method does not touch any bot state so it is
+        safe to run in a worker thread.
+
+        Returns the number of records in the log afterwards, or ``None`` if
+        the write failed.
+        """
+        path = self._bsn_path(guild_id)
+        try:
+            if full:
+                save_bsn_data(path, balances)
+                log.info("Recovered BSNBucks data in %s", path)
+                return len(balances)
+            append_bsn_deltas(path, pending)
+            return compact_bsn_log(path, balances, line_count + len(pending))
+        except Exception:
+            log.exception("Failed to save BSNBucks data to %s", path)
+            return None
+
+    def _finish_bsn_write(self, guild_id: int, pending: List[Tuple[int, int]], line_count: Optional[int]) -> None:
+        """Record the outcome of a :meth:`_write_bsn_log` call."""
+        if line_count is None:
+            # Flag the guild so its next write saves a full snapshot
+            self._persistence_failed.add(guild_id)
+            self._bsn_log_lines[guild_id] = self._bsn_log_lines.get(guild_id, 0) + len(pending)
+        else:
+            self._persistence_failed.discard(guild_id)
+            self._bsn_log_lines[guild_id] = line_count
+
+    async def close(self) -> None:
+        """Flush pending BSNBucks changes before shutting the bot down."""
+        # Go through the write lock so an append or compaction still running
+        # in a worker thread cannot overwrite this flush
+        await self.flush_bsn()
+        await super().close()
+
+    def top_bsn_balances(self, guild_id: int) -> List[Tuple[int, int]]:
+        """Return a guild's highest BSNBucks balances as ``(user_id, balance)`` pairs.
+
+        The result is cached and only recomputed after a balance in the guild
+        changes.
+        """
+        top = self._leaderboard_cache.get(guild_id)
+        if top is None:
+            top = self._leaderboard_cache[guild_id] = heapq.nlargest(
+                LEADERBOARD_SIZE, self.balances_for(guild_id).items(), key=operator.itemgetter(1)
+            )
+        return top
+
+
+def require_active_session(message: str = "There is no active game in this server.", *, ephemeral: bool = True):
+    """Decorate an :class:`SZACog` command that operates on the guild's active game.
+
+    The wrapped command defers the response, rejects use outside a guild,
+    takes the guild's game state lock and looks up the active session. If
+    there is none, ``message`` is sent and the command body is skipped;
+    otherwise the session is passed to the command as its argument after
+    ``interaction``. Apply it below ``app_commands.command``.
+
+    Parameters
+    ----------
+    message: str
+        The reply sent when the guild has no active game.
+    ephemeral: bool
+        Whether the deferred response is ephemeral.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, interaction: discord.Interaction, *args, **kwargs):
+            await interaction.response.defer(ephemeral=ephemeral)
+            guild = interaction.guild
+            if guild is None:
+                await interaction.followup.send("This command can only be used in a guild.",
+                                                ephemeral=True)
+                return
+            async with self._lock_for(guild.id):
+                session = self._get_session(guild.id)
+                if session is None:
+                    await interaction.followup.send(message, ephemeral=True)
+                    return
+                await func(self, interaction, session, *args, **kwargs)
+
+        # Hide the injected session parameter from discord.py, which builds
+        # the slash command options from the callback signature
+        signature = inspect.signature(func)
+        parameters = list(signature.parameters.values())
+        del parameters[2]
+        wrapper.__signature__ = signature.replace(parameters=parameters)
+        return wrapper
+    return decorator
+
+
+class SZACog(commands.Cog):
+    """Slash commands for running ZoneWars matches and viewing BSNBucks.
+
+    Parameters
+    ----------
+    bot: SZABot
+        The bot the commands are registered on. BSNBucks balances are read
+        from and written to the bot.
+    """
+
+    def __init__(self, bot: SZABot):
+        self.bot = bot
+        # Active game sessions keyed by guild ID
+        self.active_games: Dict[int, GameSession] = {}
+        # Bound once; looked up on every session command. active_games must
+        # only be mutated in place for this to stay valid.
+        self._get_session = self.active_games.get
+        # Locks serializing game state changes, keyed by guild ID
+        self._guild_locks: Dict[int, asyncio.Lock] = {}
+        # Voice move rate limiters keyed by guild ID
+        self._move_limiters: Dict[int, TokenBucketRateLimiter] = {}
+        # Voice move concurrency caps keyed by guild ID
+        self._move_semaphores: Dict[int, asyncio.Semaphore] = {}
+        # In-flight channel fetches keyed by channel ID
+        self._pending_channel_fetches: Dict[int, asyncio.Task] = {}
+        # Fire-and-forget tasks, referenced here so they are not garbage collected
+        self._background_tasks: Set[asyncio.Task] = set()
+
+    def _lock_for(self, guild_id: int) -> asyncio.Lock:
+        """Return the game state lock for a guild, creating it if needed."""
+        lock = self._guild_locks.get(guild_id)
+        if lock is None:
+            lock = self._guild_locks[guild_id] = asyncio.Lock()
+        return lock
+
+    def _move_limiter_for(self, guild_id: int) -> TokenBucketRateLimiter:
+        """Return the voice move rate limiter for a guild, creating it if needed."""
+        limiter = self._move_limiters.get(guild_id)
+        if limiter is None:
+            limiter = self._move_limiters[guild_id] = TokenBucketRateLimiter()
+        return limiter
+
+    def _move_semaphore_for(self, guild_id: int) -> asyncio.Semaphore:
+        """Return the voice move concurrency cap for a guild, creating it if needed."""
+        semaphore = self._move_semaphores.get(guild_id)
+        if semaphore is None:
+            semaphore = self._move_semaphores[guild_id] = asyncio.Semaphore(MAX_CONCURRENT_MOVES)
+        return semaphore
+
+    async def _fetch_channel(self, guild: discord.Guild, channel_id: int) -> Optional[discord.abc.GuildChannel]:
+        """Fetch a channel over the API, returning ``None`` if that fails."""
+        try:
+            return await guild.fetch_channel(channel_id)
+        except Exception:
+            return None
+
+    async def _get_channel_cached(self, guild: discord.Guild, channel_id: int) -> Optional[discord.abc.GuildChannel]:
+        """Fetch a channel, sharing one request between concurrent callers.
+
+        While a fetch for ``channel_id`` is in flight, every other caller
+        awaits the same task instead of issuing its own request.
+        """
+        task = self._pending_channel_fetches.get(channel_id)
+        if task is None:
+            task = asyncio.create_task(self._fetch_channel(guild, channel_id))
+            self._pending_channel_fetches[channel_id] = task
+            task.add_done_callback(lambda _: self._pending_channel_fetches.pop(channel_id, None))
+        return await task
+
+    async def _restore_target(self, guild: discord.Guild, session: GameSession, member: discord.Member,
+                              channel_cache: Dict[int, Optional[discord.abc.GuildChannel]]
+                              ) -> Optional[discord.abc.GuildChannel]:
+        """Return the voice channel a player was in before the match.
+
+        Returns ``None`` (disconnect) for players without a recorded
+        original channel, or whose original channel no longer exists.
+        Channels missing from the client cache are fetched from the API.
+        Lookups are memoized in ``channel_cache``, which is shared by all
+        players restored together.
+        """
+        orig = session.original_channels.get(member.id)
+        if orig is None:
+            return None
+        if orig not in channel_cache:
+            channel = guild.get_channel(orig)
+            if channel is None:
+                channel = await self._get_channel_cached(guild, orig)
+            channel_cache[orig] = channel
+        return channel_cache[orig]
+
+    async def _restore_member(self, guild: discord.Guild, session: GameSession, member: discord.Member,
+                              channel_cache: Dict[int, Optional[discord.abc.GuildChannel]],
+                              will_delete: Set[int]) -> None:
+        """Move a player back to where they were before the match.
+
+        Players who would only be disconnected are left alone if they sit
+        in one of the ``will_delete`` channels, since deleting the channel
+        disconnects them anyway.
+        """
+        target = await self._restore_target(guild, session, member, channel_cache)
+        if target is None and member.voice and member.voice.channel and member.voice.channel.id in will_delete:
+            return
+        await session._safe_move(member, target)
+
+    async def _cleanup_session(self, session: GameSession) -> None:
+        """Delete an ended session's channels and persist the BSN changes.
+
+        Runs at most once per session.
+        """
+        if session.torn_down:
+            return
+        session.torn_down = True
+        # Clean up temporary channels while the BSN changes are written out;
+        # the category can only go once it is empty
+        await asyncio.gather(session.teardown_channels(), self.bot.flush_bsn())
+        await session.teardown_category()
 
     # --------------- Command definitions ---------------
 
@@ -352,7 +1015,7 @@ class SZABot(commands.Bot):
         )
         embed.add_field(
             name="/bsn_leaderboard",
-            value=("Show the top players based on their BSNBucks balances."),
+            value=("Show the top players in this server based on their BSNBucks balances."),
             inline=False
         )
         embed.add_field(
@@ -365,7 +1028,7 @@ class SZABot(commands.Bot):
     @app_commands.command(name="bsn_balance", description="Show a user's BSNBucks balance")
     @app_commands.describe(member="The member whose BSNBucks balance you want to view (optional)")
     async def bsn_balance(self, interaction: discord.Interaction, member: Optional[discord.Member] = None) -> None:
-        """Display the BSNBucks balance for the invoking user or a specified user.
+        """Display the BSNBucks balance in this server for the invoking user or a specified user.
 
         Parameters
         ----------
@@ -374,8 +1037,13 @@ class SZABot(commands.Bot):
             invoking user's balance is shown.
         """
         await interaction.response.defer(ephemeral=True)
+        guild = interaction.guild
+        if guild is None:
+            await interaction.followup.send("This command can only be used in a guild.",
+                                            ephemeral=True)
+            return
         target = member or interaction.user
-        balance = self.bsn_balances.get(target.id, 0)
+        balance = self.bot.balances_for(guild.id)[target.id]
         await interaction.followup.send(
             f"{target.display_name} has {balance} $BSN.",
             ephemeral=True
@@ -383,7 +1051,7 @@ class SZABot(commands.Bot):
 
     @app_commands.command(name="bsn_leaderboard", description="Display the BSNBucks leaderboard")
     async def bsn_leaderboard(self, interaction: discord.Interaction) -> None:
-        """Show a leaderboard of the top BSNBucks holders.
+        """Show a leaderboard of the top BSNBucks holders in this server.
 
         The leaderboard displays up to the top 10 players sorted by their
         BSNBucks balances in descending order. If a user is no longer in the
@@ -391,24 +1059,26 @@ class SZABot(commands.Bot):
         """
         await interaction.response.defer(ephemeral=True)
         guild = interaction.guild
-        # Sort balances by value descending
-        sorted_balances: List[Tuple[int, int]] = sorted(
-            self.bsn_balances.items(), key=lambda item: item[1], reverse=True
-        )
+        if guild is None:
+            await interaction.followup.send("This command can only be used in a guild.",
+                                            ephemeral=True)
+            return
+        top = self.bot.top_bsn_balances(guild.id)
+        # Resolve display names once for everyone on the leaderboard
+        names: Dict[int, str] = {}
+        get_member = guild.get_member
+        for user_id, _ in top:
+            member = get_member(user_id)
+            if member:
+                names[user_id] = member.display_name
         # Build a leaderboard string
-        lines: List[str] = []
-        rank = 1
-        for user_id, amount in sorted_balances[:10]:
-            name = str(user_id)
-            if guild:
-                member = guild.get_member(user_id)
-                if member:
-                    name = member.display_name
-            lines.append(f"{rank}. {name} – {amount} $BSN")
-            rank += 1
-        if not lines:
-            lines.append("No BSNBucks have been recorded yet.")
-        leaderboard_text = "\n".join(lines)
+        if top:
+            leaderboard_text = "\n".join(
+                f"{rank}. {names.get(user_id) or user_id} – {amount} $BSN"
+                for rank, (user_id, amount) in enumerate(top, start=1)
+            )
+        else:
+            leaderboard_text = "No BSNBucks have been recorded yet."
         await interaction.followup.send(
             f"**BSNBucks Leaderboard**\n{leaderboard_text}",
             ephemeral=True
@@ -451,276 +1121,224 @@ class SZABot(commands.Bot):
         if guild is None:
             await interaction.followup.send("This command can only be used in a guild (server).", ephemeral=True)
             return
+        async with self._lock_for(guild.id):
+            # Check for an existing active game
+            if self._get_session(guild.id) is not None:
+                await interaction.followup.send("A game is already active in this server. End it before starting a new one.", ephemeral=True)
+                return
 
-        # Check for an existing active game
-        if guild.id in self.active_games:
-            await interaction.followup.send("A game is already active in this server. End it before starting a new one.", ephemeral=True)
-            return
+            # Validate team size
+            if team_size not in (2, 3, 4):
+                await interaction.followup.send("Invalid team size. Please choose 2, 3, or 4 players per team.", ephemeral=True)
+                return
 
-        # Validate team size
-        if team_size not in (2, 3, 4):
-            await interaction.followup.send("Invalid team size. Please choose 2, 3, or 4 players per team.", ephemeral=True)
-            return
+            mode_lower = mode.lower()
+            all_players: List[discord.Member] = []
+            team_a: List[discord.Member] = []
+            team_b: List[discord.Member] = []
 
-        # Parse players from the input string into Member objects
-        def parse_members(input_str: str) -> List[discord.Member]:
-            members: List[discord.Member] = []
-            if not input_str:
-                return members
-            parts = [p.strip() for p in input_str.split(',') if p.strip()]
-            for part in parts:
-                # Remove mention formatting if present
-                # e.g. <@!123456789> or <@123456789>
-                if part.startswith('<@') and part.endswith('>'):
-                    part = part[2:-1]
-                    # Remove exclamation if present
-                    if part.startswith('!'):
-                        part = part[1:]
-                # Now part should be an ID
-                try:
-                    uid = int(part)
-                except ValueError:
-                    continue
-                member = guild.get_member(uid)
-                if member is not None:
-                    members.append(member)
-            return members
-
-        mode_lower = mode.lower()
-        all_players: List[discord.Member] = []
-        team_a: List[discord.Member] = []
-        team_b: List[discord.Member] = []
-
-        # Random and draft modes require a list of players
-        if mode_lower in ("random", "draft"):
-            if not players:
-                await interaction.followup.send("You must specify the players participating in the match (comma separated).", ephemeral=True)
-                return
-            all_players = parse_members(players)
-            expected_count = team_size * 2
-            if len(all_players) != expected_count:
-                await interaction.followup.send(f"Exactly {expected_count} players are required for a {team_size}v{team_size} match.",
-                                                ephemeral=True)
-                return
-        # Manual mode requires specific teams
-        elif mode_lower == "manual":
-            if not team1 or not team2:
-                await interaction.followup.send("For manual mode you must specify players for both teams.",
+            # Random and draft modes require a list of players
+            if mode_lower in ("random", "draft"):
+                if not players:
+                    await interaction.followup.send("You must specify the players participating in the match (comma separated).", ephemeral=True)
+                    return
+                all_players = parse_members(guild, players)
+                expected_count = team_size * 2
+                if len(all_players) != expected_count:
+                    await interaction.followup.send(f"Exactly {expected_count} players are required for a {team_size}v{team_size} match.",
+                                                    ephemeral=True)
+                    return
+            # Manual mode requires specific teams
+            elif mode_lower == "manual":
+                if not team1 or not team2:
+                    await interaction.followup.send("For manual mode you must specify players for both teams.",
+                                                    ephemeral=True)
+                    return
+                team_a = parse_members(guild, team1)
+                team_b = parse_members(guild, team2)
+                if len(team_a) != team_size or len(team_b) != team_size:
+                    await interaction.followup.send(f"Each team must have exactly {team_size} players.",
+                                                    ephemeral=True)
+                    return
+                # Check for duplicate players between teams
+                team_a_ids = set(map(_member_id, team_a))
+                if any(m.id in team_a_ids for m in team_b):
+                    await interaction.followup.send("A player cannot be on both teams.",
+                                                    ephemeral=True)
+                    return
+                all_players = team_a + team_b
+            else:
+                await interaction.followup.send("Invalid mode. Please choose 'random', 'draft', or 'manual'.",
                                                 ephemeral=True)
                 return
-            team_a = parse_members(team1)
-            team_b = parse_members(team2)
+
+            # Draft mode requires captains
+            if mode_lower == "draft":
+                if not captains:
+                    await interaction.followup.send("You must specify exactly two captains (comma separated) for draft mode.",
+                                                    ephemeral=True)
+                    return
+                captain_members = parse_members(guild, captains)
+                # Ensure exactly two captains
+                if len(captain_members) != 2:
+                    await interaction.followup.send("Exactly two captains must be specified.",
+                                                    ephemeral=True)
+                    return
+                # Ensure the captains are part of the player list
+                all_ids = set(map(_member_id, all_players))
+                if any(cap.id not in all_ids for cap in captain_members):
+                    await interaction.followup.send("Captains must be among the listed players.",
+                                                    ephemeral=True)
+                    return
+                # Remove captains from player pool
+                captain_ids = set(map(_member_id, captain_members))
+                remaining_players = [m for m in all_players if m.id not in captain_ids]
+                # Assign each captain to its own team
+                team_a = [captain_members[0]]
+                team_b = [captain_members[1]]
+                # Randomly distribute the remaining players, dealing them
+                # alternately so each team gets team_size - 1 of them
+                shuffled = random.sample(remaining_players, len(remaining_players))
+                needed = team_size - 1
+                team_a += shuffled[0::2][:needed]
+                team_b += shuffled[1::2][:needed]
+            # Random mode picks team 1 at random and puts everyone else on team 2
+            elif mode_lower == "random":
+                team_a_idx = set(random.sample(range(len(all_players)), team_size))
+                team_a = [m for i, m in enumerate(all_players) if i in team_a_idx]
+                team_b = [m for i, m in enumerate(all_players) if i not in team_a_idx]
+            # Manual handled above
+
+            # At this point team_a and team_b should each have exactly team_size members
             if len(team_a) != team_size or len(team_b) != team_size:
-                await interaction.followup.send(f"Each team must have exactly {team_size} players.",
-                                                ephemeral=True)
-                return
-            # Check for duplicate players between teams
-            duplicate_ids = {m.id for m in team_a}.intersection({m.id for m in team_b})
-            if duplicate_ids:
-                await interaction.followup.send("A player cannot be on both teams.",
+                await interaction.followup.send("Internal error creating teams. Please try again.",
                                                 ephemeral=True)
                 return
-            all_players = team_a + team_b
-        else:
-            await interaction.followup.send("Invalid mode. Please choose 'random', 'draft', or 'manual'.",
-                                            ephemeral=True)
-            return
 
-        # Draft mode requires captains
-        if mode_lower == "draft":
-            if not captains:
-                await interaction.followup.send("You must specify exactly two captains (comma separated) for draft mode.",
-                                                ephemeral=True)
-                return
-            captain_members = parse_members(captains)
-            # Ensure exactly two captains
-            if len(captain_members) != 2:
-                await interaction.followup.send("Exactly two captains must be specified.",
+            # Create a new category to contain team voice channels
+            category_name = f"ZoneWars Match"
+            try:
+                category = await guild.create_category(name=category_name, reason="Creating ZoneWars match")
+            except Exception as e:
+                await interaction.followup.send(f"Failed to create category: {e}",
                                                 ephemeral=True)
                 return
-            # Ensure the captains are part of the player list
-            for cap in captain_members:
-                if cap not in all_players:
-                    await interaction.followup.send("Captains must be among the listed players.",
-                                                    ephemeral=True)
-                    return
-            # Remove captains from player pool
-            remaining_players = [m for m in all_players if m not in captain_members]
-            # Assign each captain to its own team
-            team_a = [captain_members[0]]
-            team_b = [captain_members[1]]
-            # Randomly distribute the remaining players to teams until each has team_size
-            random.shuffle(remaining_players)
-            while len(team_a) < team_size and remaining_players:
-                team_a.append(remaining_players.pop())
-            while len(team_b) < team_size and remaining_players:
-                team_b.append(remaining_players.pop())
-            # If after distribution teams are imbalanced (shouldn't happen) fill in
-            for m in remaining_players:
-                if len(team_a) < team_size:
-                    team_a.append(m)
-                elif len(team_b) < team_size:
-                    team_b.append(m)
-        # Random mode simply shuffles and divides players
-        elif mode_lower == "random":
-            random.shuffle(all_players)
-            team_a = all_players[:team_size]
-            team_b = all_players[team_size:]
-        # Manual handled above
-
-        # At this point team_a and team_b should each have exactly team_size members
-        if len(team_a) != team_size or len(team_b) != team_size:
-            await interaction.followup.send("Internal error creating teams. Please try again.",
-                                            ephemeral=True)
-            return
-
-        # Create a new category to contain team voice channels
-        category_name = f"ZoneWars Match"
-        try:
-            category = await guild.create_category(name=category_name, reason="Creating ZoneWars match")
-        except Exception as e:
-            await interaction.followup.send(f"Failed to create category: {e}",
-                                            ephemeral=True)
-            return
 
-        # Create central lobby voice channel
-        try:
-            central_vc = await guild.create_voice_channel(
-                name="Lobby",
-                category=category,
-                reason="Central lobby for ZoneWars match"
-            )
-        except Exception as e:
-            await category.delete(reason="Cleanup after failure to create lobby")
-            await interaction.followup.send(f"Failed to create lobby: {e}",
-                                            ephemeral=True)
-            return
-
-        team_channels: List[discord.VoiceChannel] = []
-        # Create two team voice channels
-        for i in range(2):
-            try:
-                vc = await guild.create_voice_channel(
-                    name=f"Team {i+1}",
+            # Create the central lobby and the two team voice channels concurrently
+            results = await asyncio.gather(
+                guild.create_voice_channel(
+                    name="Lobby",
                     category=category,
-                    reason="Team voice channel for ZoneWars match"
+                    reason="Central lobby for ZoneWars match"
+                ),
+                *(
+                    guild.create_voice_channel(
+                        name=f"Team {i+1}",
+                        category=category,
+                        reason="Team voice channel for ZoneWars match"
+                    )
+                    for i in range(2)
+                ),
+                return_exceptions=True
+            )
+            errors = [r for r in results if isinstance(r, BaseException)]
+            if errors:
+                # Cleanup the channels that were created and the category
+                created = [r for r in results if not isinstance(r, BaseException)]
+                await asyncio.gather(
+                    *(ch.delete(reason="Cleanup after failure to create match channels") for ch in created),
+                    return_exceptions=True
                 )
-                team_channels.append(vc)
-            except Exception as e:
-                # Cleanup partially created channels and category
-                for ch in team_channels:
-                    try:
-                        await ch.delete(reason="Cleanup after failure to create team channels")
-                    except Exception:
-                        pass
                 try:
-                    await central_vc.delete(reason="Cleanup after failure to create team channels")
+                    await category.delete(reason="Cleanup after failure to create match channels")
                 except Exception:
                     pass
-                await category.delete(reason="Cleanup after failure to create team channels")
-                await interaction.followup.send(f"Failed to create team channels: {e}",
+                await interaction.followup.send(f"Failed to create match channels: {errors[0]}",
                                                 ephemeral=True)
                 return
-
-        # Store game session data
-        session = GameSession(
-            guild_id=guild.id,
-            teams=[team_a, team_b],
-            team_channels=team_channels,
-            central_channel=central_vc,
-            category=category
-        )
-        self.active_games[guild.id] = session
-
-        # Move players into their team voice channels
-        await session.move_players_to_team_channels()
-
-        # Send feedback to the user summarizing team composition and voice channel info
-        team_a_names = ", ".join([member.display_name for member in team_a])
-        team_b_names = ", ".join([member.display_name for member in team_b])
-        response = (
-            f"ZoneWars match created!\n"
-            f"Team 1 ({team_size} players): {team_a_names}\n"
-            f"Team 2 ({team_size} players): {team_b_names}\n"
-            f"Players have been moved to their respective team voice channels."
-        )
-        await interaction.followup.send(response, ephemeral=True)
+            central_vc, *team_channels = results
+
+            # Store game session data
+            session = GameSession(
+                guild_id=guild.id,
+                teams=[{m.id: m for m in team_a}, {m.id: m for m in team_b}],
+                team_channels=team_channels,
+                central_channel=central_vc,
+                category=category,
+                move_limiter=self._move_limiter_for(guild.id),
+                move_semaphore=self._move_semaphore_for(guild.id)
+            )
+            self.active_games[guild.id] = session
+
+            # Move players into their team voice channels
+            await session.move_players_to_team_channels()
+
+            # Send feedback to the user summarizing team composition and voice channel info
+            team_a_names = ", ".join([session.name_cache[member.id] for member in team_a])
+            team_b_names = ", ".join([session.name_cache[member.id] for member in team_b])
+            response = (
+                f"ZoneWars match created!\n"
+                f"Team 1 ({team_size} players): {team_a_names}\n"
+                f"Team 2 ({team_size} players): {team_b_names}\n"
+                f"Players have been moved to their respective team voice channels."
+            )
+            await interaction.followup.send(response, ephemeral=True)
 
     # ---------------------------------------------------------------------
 
     @app_commands.command(name="trade_players", description="Trade players between teams in the active match")
     @app_commands.describe(member_a="Player from Team 1", member_b="Player from Team 2")
-    async def trade_players(self, interaction: discord.Interaction, member_a: discord.Member, member_b: discord.Member) -> None:
+    @require_active_session("There is no active game in this server.")
+    async def trade_players(self, interaction: discord.Interaction, session: GameSession, member_a: discord.Member, member_b: discord.Member) -> None:
         """Swap two players between teams.
 
         Parameters
         ----------
         interaction: discord.Interaction
             The interaction that triggered the command.
+        session: GameSession
+            The active game in the guild, supplied by ``require_active_session``.
         member_a: discord.Member
             A player on Team 1 that you wish to trade.
         member_b: discord.Member
             A player on Team 2 that you wish to trade.
         """
-        await interaction.response.defer(ephemeral=True)
-        guild = interaction.guild
-        if guild is None:
-            await interaction.followup.send("This command can only be used in a guild.",
-                                            ephemeral=True)
-            return
-        session = self.active_games.get(guild.id)
-        if session is None:
-            await interaction.followup.send("There is no active game in this server.",
-                                            ephemeral=True)
-            return
         # Ensure both players are part of the game
-        team1 = session.teams[0]
-        team2 = session.teams[1]
-        if member_a not in team1 or member_b not in team2:
+        team1_ids, team2_ids = session.team_member_ids
+        if member_a.id not in team1_ids or member_b.id not in team2_ids:
             await interaction.followup.send("One or both of the specified players are not on the expected teams.",
                                             ephemeral=True)
             return
         # Perform the swap
-        team1.remove(member_a)
-        team1.append(member_b)
-        team2.remove(member_b)
-        team2.append(member_a)
+        team1, team2 = session.teams
+        del team1[member_a.id]
+        team1[member_b.id] = member_b
+        del team2[member_b.id]
+        team2[member_a.id] = member_a
         # Update voice channel assignments if currently not paused
-        try:
-            if not session.paused:
+        if not session.paused:
+            await asyncio.gather(
                 # Move member_a (now on team2) to Team2 channel
-                await member_a.move_to(session.team_channels[1])
+                session._safe_move(member_a, session.team_channels[1]),
                 # Move member_b (now on team1) to Team1 channel
-                await member_b.move_to(session.team_channels[0])
-        except Exception:
-            # Move errors ignored
-            pass
+                session._safe_move(member_b, session.team_channels[0]),
+            )
         await interaction.followup.send(
-            f"Traded {member_a.display_name} and {member_b.display_name} between teams.",
+            f"Traded {session.name_cache[member_a.id]} and {session.name_cache[member_b.id]} between teams.",
             ephemeral=True
         )
 
     # ---------------------------------------------------------------------
 
     @app_commands.command(name="pause_game", description="Pause the active ZoneWars match and move everyone to the lobby")
-    async def pause_game(self, interaction: discord.Interaction) -> None:
+    @require_active_session("There is no active game to pause.")
+    async def pause_game(self, interaction: discord.Interaction, session: GameSession) -> None:
         """Pause the current match.
 
         Moves all players from their team channels to the central lobby channel
         and marks the game as paused. If the game is already paused this
         command has no effect.
         """
-        await interaction.response.defer(ephemeral=True)
-        guild = interaction.guild
-        if guild is None:
-            await interaction.followup.send("This command can only be used in a guild.",
-                                            ephemeral=True)
-            return
-        session = self.active_games.get(guild.id)
-        if session is None:
-            await interaction.followup.send("There is no active game to pause.",
-                                            ephemeral=True)
-            return
         if session.paused:
             await interaction.followup.send("The game is already paused.",
                                             ephemeral=True)
@@ -734,23 +1352,13 @@ class SZABot(commands.Bot):
     # ---------------------------------------------------------------------
 
     @app_commands.command(name="resume_game", description="Resume the paused ZoneWars match and return players to their teams")
-    async def resume_game(self, interaction: discord.Interaction) -> None:
+    @require_active_session("There is no active game to resume.")
+    async def resume_game(self, interaction: discord.Interaction, session: GameSession) -> None:
         """Resume a paused match.
 
         Moves all players back to the voice channels they were in prior to
         pausing. If the game is not paused this command has no effect.
         """
-        await interaction.response.defer(ephemeral=True)
-        guild = interaction.guild
-        if guild is None:
-            await interaction.followup.send("This command can only be used in a guild.",
-                                            ephemeral=True)
-            return
-        session = self.active_games.get(guild.id)
-        if session is None:
-            await interaction.followup.send("There is no active game to resume.",
-                                            ephemeral=True)
-            return
         if not session.paused:
             await interaction.followup.send("The game is not paused.",
                                             ephemeral=True)
@@ -765,30 +1373,24 @@ class SZABot(commands.Bot):
 
     @app_commands.command(name="end_game", description="End the current ZoneWars match and award BSNBucks")
     @app_commands.describe(winning_team="Specify the winning team: 1 or 2")
-    async def end_game(self, interaction: discord.Interaction, winning_team: int) -> None:
+    @require_active_session("There is no active game to end.")
+    async def end_game(self, interaction: discord.Interaction, session: GameSession, winning_team: int) -> None:
         """End the active match and award/penalize BSNBucks.
 
         Parameters
         ----------
         interaction: discord.Interaction
             The interaction that triggered the command.
+        session: GameSession
+            The active game in the guild, supplied by ``require_active_session``.
         winning_team: int
             The number of the team that won (1 or 2).
 
-        After updating the BSNBucks balances the bot cleans up all
-        temporary channels and deletes the game session.
+        After updating the BSNBucks balances the bot deletes the game
+        session, replies with the result and then cleans up all temporary
+        channels in the background.
         """
-        await interaction.response.defer(ephemeral=True)
         guild = interaction.guild
-        if guild is None:
-            await interaction.followup.send("This command can only be used in a guild.",
-                                            ephemeral=True)
-            return
-        session = self.active_games.get(guild.id)
-        if session is None:
-            await interaction.followup.send("There is no active game to end.",
-                                            ephemeral=True)
-            return
         # Validate winning_team
         if winning_team not in (1, 2):
             await interaction.followup.send("Winning team must be 1 or 2.",
@@ -796,51 +1398,46 @@ class SZABot(commands.Bot):
             return
         # Determine winners and losers
         win_index = winning_team - 1
-        winners = session.teams[win_index]
-        losers = session.teams[1 - win_index]
-        # Award winners and penalize losers
-        for member in winners:
-            self.add_bsn(member, 10)
-        for member in losers:
-            self.add_bsn(member, -10)
-        # If paused, move players back to lobby before end
-        if session.paused:
-            try:
-                await session.move_back_from_central()
-            except Exception:
-                pass
-        # Return players to their original channels if recorded
-        for team in session.teams:
-            for member in team:
-                try:
-                    orig = session.original_channels.get(member.id)
-                    if orig is not None:
-                        original_channel = guild.get_channel(orig)
-                        if original_channel:
-                            await member.move_to(original_channel)
-                        else:
-                            # If original channel disappeared just disconnect them
-                            await member.move_to(None)
-                    else:
-                        # If there was no original channel we disconnect them
-                        await member.move_to(None)
-                except Exception:
-                    continue
-        # Clean up temporary channels and category
-        await session.teardown()
-        # Remove the session
-        del self.active_games[guild.id]
+        winners = session.teams[win_index].values()
+        losers = session.teams[1 - win_index].values()
+        # Award winners and penalize losers in one batch
+        deltas = {m.id: 10 for m in winners} | {m.id: -10 for m in losers}
+        self.bot.apply_bsn_delta(session.guild_id, deltas)
+        # Return players to their original channels if recorded. This works
+        # from the lobby as well, so a paused game needs no extra move back
+        # to the team channels first.
+        # Many players usually come from the same channel, so resolve each one once
+        channel_cache: Dict[int, Optional[discord.abc.GuildChannel]] = {}
+        # Deleting the match channels disconnects everyone still inside, so
+        # players who would only be disconnected need no move request
+        will_delete = {ch.id for ch in session.team_channels}
+        will_delete.add(session.central_channel.id)
+        # Players who already left voice cannot be moved, so skip their requests
+        all_members = [m for team in session.teams for m in team.values()]
+        to_move = [m for m in all_members if m.voice and m.voice.channel]
+        coros = [self._restore_member(guild, session, m, channel_cache, will_delete) for m in to_move]
+        # _safe_move already ignores failures for each player
+        await asyncio.gather(*coros)
+        session.paused = False
+        session.paused_locations.clear()
+        # Remove the session so new commands no longer see it
+        del self.active_games[session.guild_id]
         # Summarize results
-        winner_names = ", ".join([m.display_name for m in winners])
-        loser_names = ", ".join([m.display_name for m in losers])
+        name_cache = session.name_cache
+        winner_names = ", ".join(name_cache[m.id] for m in winners)
+        loser_names = ", ".join(name_cache[m.id] for m in losers)
         response = (
             f"Match ended. Team {winning_team} won!\n"
             f"Winners (+10 $BSN each): {winner_names}\n"
             f"Losers (-10 $BSN each): {loser_names}\n"
-            f"All temporary channels have been deleted."
+            f"Temporary channels are being deleted."
         )
         # Send the result to the user. Make the message ephemeral to avoid spamming the channel.
         await interaction.followup.send(response, ephemeral=True)
+        # Tear down in the background so the user does not wait on the deletes
+        task = asyncio.create_task(self._cleanup_session(session))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
 
 
 def main() -> None:
@@ -853,7 +1450,7 @@ def main() -> None:
     token = os.environ.get("DISCORD_BOT_TOKEN")
     if not token:
         raise RuntimeError("DISCORD_BOT_TOKEN environment variable is not set.")
-    bot = SZABot(command_prefix="!", bsn_file="bsn_data.json")
+    bot = SZABot(command_prefix="!", bsn_dir="bsn", legacy_bsn_file="bsn_data.json")
     bot.run(token)
 
 